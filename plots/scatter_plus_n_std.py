@@ -20,6 +20,8 @@ file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(mes
 logging.basicConfig(level=logging.INFO, handlers=[stream_handler, file_handler])
 logger = logging.getLogger(__name__)
 
+ENERGY_TYPES = ['EnergyLeft', 'EnergyRight', 'Energy']
+
 def load_snp_data(snp_file_path):
     """
     Загружает данные о SNP из файла.
@@ -88,21 +90,72 @@ def calculate_arm_ranges(arm_size, center, arm3_start, arm4_start):
         (arm4_start, arm4_end)
     ]
 
-def get_snps_in_construct(construct_id, snp_positions):
+def build_arm_ranges(construct_ids):
     """
-    Возвращает список SNP, присутствующих в конструкте.
+    Парсит ID конструктов.
+    Возвращает индексы распознанных ID и массив диапазонов их плеч формы (n, 4, 2).
     """
-    arm_size, center, arm3_start, arm4_start = parse_construct_id(construct_id)
-    if None in (arm_size, center, arm3_start, arm4_start):
-        return []
-    arm_ranges = calculate_arm_ranges(arm_size, center, arm3_start, arm4_start)
-    snps_in_construct = []
-    for snp in snp_positions:
-        for start, end in arm_ranges:
-            if start <= snp <= end:
-                snps_in_construct.append(snp)
-                break
-    return snps_in_construct
+    parsed_idx = []
+    arm_ranges = []
+    for i, construct_id in enumerate(construct_ids):
+        arm_size, center, arm3_start, arm4_start = parse_construct_id(construct_id)
+        if None in (arm_size, center, arm3_start, arm4_start):
+            continue
+        parsed_idx.append(i)
+        arm_ranges.append(calculate_arm_ranges(arm_size, center, arm3_start, arm4_start))
+    return parsed_idx, np.array(arm_ranges, dtype=np.int64).reshape(-1, 4, 2)
+
+def find_first_snps(arm_ranges, snp_positions):
+    """
+    Для каждого конструкта возвращает минимальную позицию SNP в его плечах или -1.
+    """
+    if not snp_positions or len(arm_ranges) == 0:
+        return np.full(len(arm_ranges), -1, dtype=np.int64)
+    snps = np.array(sorted(snp_positions), dtype=np.int64)
+    starts = np.searchsorted(snps, arm_ranges[:, :, 0], side='left')
+    ends = np.searchsorted(snps, arm_ranges[:, :, 1], side='right')
+    has_snp = ends > starts
+    first_snps = np.where(has_snp, snps[np.minimum(starts, len(snps) - 1)], np.iinfo(np.int64).max).min(axis=1)
+    return np.where(has_snp.any(axis=1), first_snps, -1)
+
+def assign_construct_snps(construct_ids, snp_positions):
+    """
+    Для каждого конструкта возвращает минимальную позицию SNP в его плечах или None.
+    """
+    construct_ids = list(construct_ids)
+    selected_snps = [None] * len(construct_ids)
+    parsed_idx, arm_ranges = build_arm_ranges(construct_ids)
+    for i, first_snp in zip(parsed_idx, find_first_snps(arm_ranges, snp_positions)):
+        if first_snp >= 0:
+            selected_snps[i] = int(first_snp)
+    return selected_snps
+
+def select_affected_constructs(construct_ids, snp_positions):
+    """
+    Возвращает ID конструктов, плечи которых перекрывают хотя бы один SNP.
+    Нераспознанные ID считаются затронутыми, остальные конструкты - неизменёнными.
+    """
+    construct_ids = list(construct_ids)
+    parsed_idx, arm_ranges = build_arm_ranges(construct_ids)
+    affected = np.ones(len(construct_ids), dtype=bool)
+    affected[parsed_idx] = find_first_snps(arm_ranges, snp_positions) >= 0
+    unparsed_count = len(construct_ids) - len(parsed_idx)
+    if unparsed_count:
+        logger.warning(f"Не удалось распознать {unparsed_count} ID конструктов, они считаются затронутыми")
+    return [construct_id for construct_id, hit in zip(construct_ids, affected) if hit]
+
+def load_affected_constructs(affected_file_path):
+    """
+    Загружает список затронутых конструктов из файла.
+    Возвращает множество ID конструктов.
+    """
+    try:
+        affected_constructs = set(pd.read_csv(affected_file_path)['ConstructID'])
+        logger.info(f"Загружено {len(affected_constructs)} затронутых конструктов из файла {affected_file_path}")
+        return affected_constructs
+    except Exception as e:
+        logger.error(f"Ошибка загрузки файла затронутых конструктов {affected_file_path}: {e}")
+        return None
 
 def generate_distinct_colors(n):
     """
@@ -117,15 +170,15 @@ def generate_distinct_colors(n):
         colors.append(rgb)
     return colors
 
-def calculate_outlier_stats(ref_data, alt_data):
+def calculate_outlier_stats(ref_data, alt_data, n_std=2):
     """
-    Рассчитывает статистику выбросов.
+    Рассчитывает статистику выбросов за порогом n_std стандартных отклонений.
     """
     diff = np.array(ref_data) - np.array(alt_data)
     mean_diff = np.mean(diff)
     std_diff = np.std(diff)
-    upper_outliers = diff > mean_diff + 2 * std_diff
-    lower_outliers = diff < mean_diff - 2 * std_diff
+    upper_outliers = diff > mean_diff + n_std * std_diff
+    lower_outliers = diff < mean_diff - n_std * std_diff
     normal_points = ~(upper_outliers | lower_outliers)
     return mean_diff, std_diff, upper_outliers, lower_outliers, normal_points
 
@@ -160,24 +213,17 @@ def add_diagonal_line(ax, min_e, max_e):
     """
     ax.plot([min_e, max_e], [min_e, max_e], 'k--', linewidth=2, alpha=0.7)
 
-def add_outlier_zones(ax, x, mean_diff, std_diff, min_e, max_e):
+def add_outlier_zones(ax, x, mean_diff, std_diff, min_e, max_e, n_std=2):
     """
-    Добавляет заполненные зоны для выбросов.
+    Добавляет заполненные зоны для выбросов на уровнях n_std, n_std+1 и n_std+2.
     """
-    line_upper = x - (mean_diff + 2 * std_diff)
-    line_lower = x - (mean_diff - 2 * std_diff)
-    line_upper_1 = x - (mean_diff + 3 * std_diff)
-    line_lower_1 = x - (mean_diff - 3 * std_diff)
-    line_upper_2 = x - (mean_diff + 4 * std_diff)
-    line_lower_2 = x - (mean_diff - 4 * std_diff)
-    ax.fill_between(x, min_e, line_upper, color='red', alpha=0.1, label='Верхние выбросы (+2std)')
-    ax.fill_between(x, line_lower, max_e, color='green', alpha=0.1, label='Нижние выбросы (-2std)')
-    ax.fill_between(x, min_e, line_upper_1, color='red', alpha=0.1, label='Верхние выбросы (+3std)')
-    ax.fill_between(x, line_lower_1, max_e, color='green', alpha=0.1, label='Нижние выбросы (-3std)')
-    ax.fill_between(x, min_e, line_upper_2, color='red', alpha=0.1, label='Верхние выбросы (+4std)')
-    ax.fill_between(x, line_lower_2, max_e, color='green', alpha=0.1, label='Нижние выбросы (-4std)')
+    for level in (n_std, n_std + 1, n_std + 2):
+        line_upper = x - (mean_diff + level * std_diff)
+        line_lower = x - (mean_diff - level * std_diff)
+        ax.fill_between(x, min_e, line_upper, color='red', alpha=0.1, label=f'Верхние выбросы (+{level:g}std)')
+        ax.fill_between(x, line_lower, max_e, color='green', alpha=0.1, label=f'Нижние выбросы (-{level:g}std)')
 
-def create_legend_elements(snp_colors):
+def create_legend_elements(snp_colors, n_std=2):
     """
     Создаёт элементы легенды.
     """
@@ -201,36 +247,40 @@ def create_legend_elements(snp_colors):
     )
     legend_elements.append(
         Line2D([0], [0], marker='o', color='w', markerfacecolor=gray_rgb, 
-               markeredgecolor='green', markersize=12, label='Верхние выбросы (+2std)', linewidth=3)
+               markeredgecolor='green', markersize=12, label=f'Верхние выбросы (+{n_std:g}std)', linewidth=3)
     )
     legend_elements.append(
         Line2D([0], [0], marker='o', color='w', markerfacecolor=gray_rgb, 
-               markeredgecolor='red', markersize=12, label='Нижние выбросы (-2std)', linewidth=3)
+               markeredgecolor='red', markersize=12, label=f'Нижние выбросы (-{n_std:g}std)', linewidth=3)
     )
     legend_elements.append(
         Line2D([0], [0], color='k', linestyle='--', linewidth=2, label='Диагональ (x=y)')
     )
     return legend_elements
 
-def plot_energy_comparison(ref_data, alt_data, snp_values, snp_colors, energy_type, output_dir, individual_id):
+def plot_energy_comparison(energy_df, energy_stats, snp_colors, energy_type, output_dir, individual_id):
     """
     Строит scatterplot с раскраской точек по конкретным SNP и выделением выбросов.
+    Точки и маски выбросов берутся из результата analyze_individual.
     """
-    if not ref_data or not alt_data:
+    if energy_df.empty:
         logger.warning(f"Нет данных для построения графика {energy_type}")
         return
 
-    min_len = min(len(ref_data), len(alt_data), len(snp_values))
-    ref_data = ref_data[:min_len]
-    alt_data = alt_data[:min_len]
-    snp_values = snp_values[:min_len]
-    
-    mean_diff, std_diff, upper_outliers, lower_outliers, normal_points = calculate_outlier_stats(ref_data, alt_data)
+    ref_data = energy_df['ref'].to_numpy()
+    alt_data = energy_df['alt'].to_numpy()
+    snp_values = [None if pd.isna(snp) else int(snp) for snp in energy_df['snp']]
+    upper_outliers = energy_df['upper_outlier'].to_numpy()
+    lower_outliers = energy_df['lower_outlier'].to_numpy()
+    normal_points = ~(upper_outliers | lower_outliers)
+    mean_diff = energy_stats['mean_diff']
+    std_diff = energy_stats['std_diff']
+    n_std = energy_stats['n_std']
     
     logger.info(f"Для {energy_type}:")
     logger.info(f"  Средняя разница: {mean_diff:.2f}, Стандартное отклонение: {std_diff:.2f}")
-    logger.info(f"  Верхние выбросы (> +2std): {np.sum(upper_outliers)} точек")
-    logger.info(f"  Нижние выбросы (< -2std): {np.sum(lower_outliers)} точек")
+    logger.info(f"  Верхние выбросы (> +{n_std:g}std): {energy_stats['upper_outliers']} точек")
+    logger.info(f"  Нижние выбросы (< -{n_std:g}std): {energy_stats['lower_outliers']} точек")
 
     fig, ax = plt.subplots(figsize=(16, 12))
     
@@ -241,13 +291,13 @@ def plot_energy_comparison(ref_data, alt_data, snp_values, snp_colors, energy_ty
     add_diagonal_line(ax, min_e, max_e)
     
     x = np.linspace(min_e, max_e, 100)
-    add_outlier_zones(ax, x, mean_diff, std_diff, min_e, max_e)
+    add_outlier_zones(ax, x, mean_diff, std_diff, min_e, max_e, n_std)
 
     plt.title(f'Сравнение {energy_type} с выделением выбросов', fontsize=18)
     plt.xlabel('Референсная энергия (ккал/моль)', fontsize=16)
     plt.ylabel('Альтернативная энергия (ккал/моль)', fontsize=16)
     
-    legend_elements = create_legend_elements(snp_colors)
+    legend_elements = create_legend_elements(snp_colors, n_std)
     ax.legend(handles=legend_elements, loc='center left', bbox_to_anchor=(1, 0.5), fontsize=12, title="Легенда", title_fontsize=14)
 
     plt.grid(True, linestyle='--', alpha=0.2)
@@ -260,14 +310,6 @@ def plot_energy_comparison(ref_data, alt_data, snp_values, snp_colors, energy_ty
     plt.savefig(output_path, dpi=250, bbox_inches='tight')
     plt.close()
     logger.info(f"График сохранён: {output_path}")
-    
-    return {
-        'mean_diff': mean_diff,
-        'std_diff': std_diff,
-        'upper_outliers': np.sum(upper_outliers),
-        'lower_outliers': np.sum(lower_outliers),
-        'total_points': len(ref_data)
-    }
 
 def find_individual_dirs(base_dir):
     """Находит все поддиректории, названия которых оканчиваются на цифру"""
@@ -284,21 +326,126 @@ def find_individual_dirs(base_dir):
                 logger.warning(f"Не удалось извлечь ID из названия директории: {entry}")
     return individual_dirs
 
-def initialize_data():
+def load_energy_tables(ref_dir, alt_dir, individual_id, affected_constructs=None):
     """
-    Инициализирует структуры данных для хранения энергий и статистики.
+    Загружает таблицы энергий референса и теста.
+    Если передан набор затронутых конструктов, альтернативные файлы читаются только при наличии в них затронутых конструктов.
+    В обе таблицы добавляется столбец SourceFile с именем референсного файла.
+    Возвращает ref_df, alt_df.
     """
-    energy_data = {
-        'EnergyLeft': {'ref': [], 'alt': [], 'snp_value': []},
-        'EnergyRight': {'ref': [], 'alt': [], 'snp_value': []},
-        'Energy': {'ref': [], 'alt': [], 'snp_value': []}
-    }
-    snp_counter = defaultdict(int)
-    return energy_data, snp_counter
+    ref_frames = []
+    alt_frames = []
+    for ref_file in os.listdir(ref_dir):
+        if not ref_file.endswith("EF.csv"):
+            continue
+        alt_file = ref_file.replace("SEQ-g38_Mt-Short_Test", f"SEQ-g38_Mt-Short_Test-test_individual_{individual_id}", 1)
+        ref_path = os.path.join(ref_dir, ref_file)
+        alt_path = os.path.join(alt_dir, alt_file)
+        try:
+            ref_df = pd.read_csv(ref_path)
+            if ref_df.empty:
+                logger.warning(f"Референсный файл пуст: {ref_file}")
+                continue
+            needs_alt = affected_constructs is None or ref_df['ConstructID'].isin(affected_constructs).any()
+            if needs_alt:
+                if not os.path.exists(alt_path):
+                    logger.warning(f"Альтернативный файл не найден: {alt_path}")
+                    if affected_constructs is None:
+                        continue
+                else:
+                    alt_df = pd.read_csv(alt_path)
+                    if alt_df.empty:
+                        logger.warning(f"Альтернативный файл пуст: {alt_file}")
+                        if affected_constructs is None:
+                            continue
+                    alt_frames.append(alt_df.assign(SourceFile=ref_file))
+            ref_frames.append(ref_df.assign(SourceFile=ref_file))
+        except Exception as e:
+            logger.error(f"Ошибка при обработке файла {ref_file}: {e}")
+    empty_df = pd.DataFrame(columns=['ConstructID'] + ENERGY_TYPES + ['SourceFile'])
+    ref_df = pd.concat(ref_frames, ignore_index=True) if ref_frames else empty_df
+    alt_df = pd.concat(alt_frames, ignore_index=True) if alt_frames else empty_df
+    return ref_df, alt_df
+
+def analyze_individual(ref_df, alt_df, snp_positions, n_std=2, affected_constructs=None):
+    """
+    Сопоставляет энергии референса и теста без обращения к диску.
+    Возвращает DataFrame (ConstructID, [SourceFile,] energy_type, ref, alt, diff, snp, upper_outlier, lower_outlier)
+    и словарь статистики выбросов по типам энергии.
+    Строки сопоставляются по ConstructID, а при наличии столбца SourceFile в обеих таблицах - по паре (SourceFile, ConstructID).
+    Если передан набор затронутых конструктов, остальные считаются неизменёнными (alt = ref).
+    """
+    keys = ['SourceFile', 'ConstructID'] if 'SourceFile' in ref_df and 'SourceFile' in alt_df else ['ConstructID']
+    ref_dedup = ref_df.drop_duplicates(keys)
+    alt_dedup = alt_df.drop_duplicates(keys)
+    for name, before, after in (('референса', ref_df, ref_dedup), ('теста', alt_df, alt_dedup)):
+        if len(before) != len(after):
+            logger.warning(f"Отброшено {len(before) - len(after)} повторяющихся строк {name} по ключу {keys}")
+    ref_df, alt_df = ref_dedup, alt_dedup
+    if affected_constructs is not None:
+        alt_df = alt_df[alt_df['ConstructID'].isin(affected_constructs)]
+    if 'SourceFile' not in keys:
+        ref_df = ref_df.drop(columns='SourceFile', errors='ignore')
+        alt_df = alt_df.drop(columns='SourceFile', errors='ignore')
+    merged = ref_df.merge(alt_df, on=keys, how='left', suffixes=('_ref', '_alt'), indicator=True)
+    if affected_constructs is not None:
+        unchanged = ~merged['ConstructID'].isin(affected_constructs)
+    else:
+        unchanged = pd.Series(False, index=merged.index)
+    missing = ~unchanged & (merged['_merge'] == 'left_only')
+    if missing.any():
+        logger.warning(f"Нет альтернативных энергий для {missing.sum()} конструктов, они пропущены")
+        merged = merged[~missing]
+        unchanged = unchanged[~missing]
+    merged = merged.copy()
+    merged['snp'] = pd.array(assign_construct_snps(merged['ConstructID'], snp_positions), dtype='Int64')
 
-def process_individual(ref_dir, alt_dir, snp_file_path, output_dir, individual_id):
+    frames = []
+    stats = {}
+    for energy_type in ENERGY_TYPES:
+        ref_col = f"{energy_type}_ref"
+        alt_col = f"{energy_type}_alt"
+        if ref_col not in merged or alt_col not in merged:
+            logger.warning(f"Нет данных для {energy_type}")
+            continue
+        alt_vals = merged[alt_col].where(~unchanged, merged[ref_col])
+        energy_df = pd.DataFrame({
+            **{key: merged[key] for key in keys},
+            'energy_type': energy_type,
+            'ref': pd.to_numeric(merged[ref_col], errors='coerce'),
+            'alt': pd.to_numeric(alt_vals, errors='coerce'),
+            'snp': merged['snp']
+        }).dropna(subset=['ref', 'alt'])
+        if energy_df.empty:
+            logger.warning(f"Нет данных для {energy_type}")
+            continue
+        mean_diff, std_diff, upper_outliers, lower_outliers, _ = calculate_outlier_stats(
+            energy_df['ref'].to_numpy(), energy_df['alt'].to_numpy(), n_std
+        )
+        energy_df['diff'] = energy_df['ref'] - energy_df['alt']
+        energy_df['upper_outlier'] = upper_outliers
+        energy_df['lower_outlier'] = lower_outliers
+        frames.append(energy_df)
+        stats[energy_type] = {
+            'mean_diff': mean_diff,
+            'std_diff': std_diff,
+            'upper_outliers': int(np.sum(upper_outliers)),
+            'lower_outliers': int(np.sum(lower_outliers)),
+            'total_points': len(energy_df),
+            'n_std': n_std
+        }
+
+    columns = keys + ['energy_type', 'ref', 'alt', 'diff', 'snp', 'upper_outlier', 'lower_outlier']
+    result_df = pd.concat(frames, ignore_index=True)[columns] if frames else pd.DataFrame(columns=columns)
+    return result_df, stats
+
+def process_individual(ref_dir, alt_dir, snp_file_path, output_dir, individual_id, affected_file_path=None,
+                       n_std=2, plot=True, write_stats=True):
     """
-    Обрабатывает данные для одного теста
+    Обрабатывает данные для одного теста.
+    Если передан файл затронутых конструктов, альтернативные энергии читаются только для них.
+    Графики и файл статистики строятся опционально поверх analyze_individual.
+    Возвращает DataFrame сопоставленных энергий и словарь статистики.
     """
     logger.info(f"Обработка теста с ID: {individual_id}")
     logger.info(f"Директория теста: {alt_dir}")
@@ -310,92 +457,40 @@ def process_individual(ref_dir, alt_dir, snp_file_path, output_dir, individual_i
     else:
         logger.warning(f"Файл SNP не найден: {snp_file_path}. Все точки будут серыми.")
     
-    energy_data, snp_counter = initialize_data()
-    all_snps = sorted(snp_positions)
-    snp_colors = {snp: generate_distinct_colors(len(all_snps))[i] for i, snp in enumerate(all_snps)} if all_snps else {}
+    affected_constructs = None
+    if affected_file_path and os.path.exists(affected_file_path):
+        affected_constructs = load_affected_constructs(affected_file_path)
     
-    total_constructs, snp_constructs, error_constructs = process_constructs(
-        ref_dir, alt_dir, snp_positions, energy_data, snp_counter, individual_id
-    )
-    log_statistics(total_constructs, snp_constructs, error_constructs, snp_counter)
+    ref_df, alt_df = load_energy_tables(ref_dir, alt_dir, individual_id, affected_constructs)
+    result_df, outliers_stats = analyze_individual(ref_df, alt_df, snp_positions, n_std, affected_constructs)
+    
+    compared_df = result_df.drop_duplicates([col for col in ('SourceFile', 'ConstructID') if col in result_df])
+    snp_counter = defaultdict(int, compared_df['snp'].dropna().astype(int).value_counts().to_dict())
+    log_statistics(len(ref_df), len(compared_df), int(compared_df['snp'].notna().sum()), snp_counter)
     
-    outliers_stats = {}
-    for energy_type in energy_data:
-        ref_vals = energy_data[energy_type]['ref']
-        alt_vals = energy_data[energy_type]['alt']
-        snp_vals = energy_data[energy_type]['snp_value']
-        if ref_vals and alt_vals:
-            stats = plot_energy_comparison(
-                ref_vals, alt_vals, snp_vals, snp_colors, 
+    if plot:
+        all_snps = sorted(snp_positions)
+        snp_colors = {snp: generate_distinct_colors(len(all_snps))[i] for i, snp in enumerate(all_snps)} if all_snps else {}
+        for energy_type, energy_df in result_df.groupby('energy_type', sort=False):
+            plot_energy_comparison(
+                energy_df, outliers_stats[energy_type], snp_colors, 
                 energy_type, output_dir, individual_id
             )
-            outliers_stats[energy_type] = stats
-        else:
-            logger.warning(f"Нет данных для {energy_type}")
     
-    write_outlier_stats(outliers_stats, output_dir, individual_id)
-
-def process_constructs(ref_dir, alt_dir, snp_positions, energy_data, snp_counter, individual_id):
-    """
-    Обрабатывает файлы и конструкты, собирая данные об энергиях и SNP.
-    """
-    total_constructs = 0
-    snp_constructs = 0
-    error_constructs = 0
-    for alt_file in os.listdir(alt_dir):
-        if not alt_file.endswith("EF.csv"):
-            continue
-        ref_file = alt_file.replace(f"SEQ-g38_Mt-Short_Test-test_individual_{individual_id}", "SEQ-g38_Mt-Short_Test")
-        ref_path = os.path.join(ref_dir, ref_file)
-        alt_path = os.path.join(alt_dir, alt_file)
-        if not os.path.exists(ref_path):
-            logger.warning(f"Референсный файл не найден: {ref_path}")
-            continue
-        try:
-            ref_df = pd.read_csv(ref_path)
-            alt_df = pd.read_csv(alt_path)
-            if ref_df.empty or alt_df.empty:
-                logger.warning(f"Один из файлов пуст: {alt_file}")
-                continue
-            for idx, (_, alt_row) in enumerate(alt_df.iterrows()):
-                total_constructs += 1
-                construct_id = alt_row['ConstructID']
-                try:
-                    snps_in_construct = get_snps_in_construct(construct_id, snp_positions)
-                    if snps_in_construct:
-                        snp_constructs += 1
-                        selected_snp = min(snps_in_construct)
-                        snp_counter[selected_snp] += 1
-                    else:
-                        selected_snp = None
-                except Exception as e:
-                    logger.error(f"Ошибка обработки SNP для конструкта {construct_id}: {e}")
-                    error_constructs += 1
-                    selected_snp = None
-                if idx < len(ref_df):
-                    ref_row = ref_df.iloc[idx]
-                    for energy_type in ['EnergyLeft', 'EnergyRight', 'Energy']:
-                        if energy_type in alt_row and energy_type in ref_row:
-                            alt_val = alt_row[energy_type]
-                            ref_val = ref_row[energy_type]
-                            if not np.isnan(alt_val) and not np.isnan(ref_val):
-                                energy_data[energy_type]['ref'].append(ref_val)
-                                energy_data[energy_type]['alt'].append(alt_val)
-                                energy_data[energy_type]['snp_value'].append(selected_snp)
-                else:
-                    logger.warning(f"Нет соответствующей строки в референсном файле для конструкта {construct_id}")
-        except Exception as e:
-            logger.error(f"Ошибка при обработке файла {alt_file}: {e}")
-    return total_constructs, snp_constructs, error_constructs
+    if write_stats:
+        write_outlier_stats(outliers_stats, output_dir, individual_id)
+    
+    return result_df, outliers_stats
 
-def log_statistics(total_constructs, snp_constructs, error_constructs, snp_counter):
+def log_statistics(total_constructs, compared_constructs, snp_constructs, snp_counter):
     """
     Логирует статистику обработки конструктов.
     """
     logger.info(f"Всего обработано конструктов: {total_constructs}")
+    logger.info(f"Сопоставлено конструктов: {compared_constructs}")
     logger.info(f"Конструктов с SNP: {snp_constructs}")
-    logger.info(f"Конструктов без SNP: {total_constructs - snp_constructs}")
-    logger.info(f"Конструктов с ошибками обработки: {error_constructs}")
+    logger.info(f"Конструктов без SNP: {compared_constructs - snp_constructs}")
+    logger.info(f"Конструктов без сопоставленных энергий: {total_constructs - compared_constructs}")
     sorted_snps = sorted(snp_counter.items(), key=lambda x: x[1], reverse=True)[:10]
     logger.info("Топ-10 самых частых SNP:")
     for snp, count in sorted_snps:
@@ -414,8 +509,9 @@ def write_outlier_stats(outliers_stats, output_dir, individual_id):
             f.write(f"  Всего точек: {stats['total_points']}\n")
             f.write(f"  Средняя разница (ref - alt): {stats['mean_diff']:.4f}\n")
             f.write(f"  Стандартное отклонение: {stats['std_diff']:.4f}\n")
-            f.write(f"  Верхние выбросы (> +2std): {stats['upper_outliers']} ({stats['upper_outliers']/stats['total_points']*100:.2f}%)\n")
-            f.write(f"  Нижние выбросы (< -2std): {stats['lower_outliers']} ({stats['lower_outliers']/stats['total_points']*100:.2f}%)\n")
+            n_std = stats.get('n_std', 2)
+            f.write(f"  Верхние выбросы (> +{n_std:g}std): {stats['upper_outliers']} ({stats['upper_outliers']/stats['total_points']*100:.2f}%)\n")
+            f.write(f"  Нижние выбросы (< -{n_std:g}std): {stats['lower_outliers']} ({stats['lower_outliers']/stats['total_points']*100:.2f}%)\n")
             f.write("\n")
     logger.info(f"Статистика по выбросам сохранена: {stats_path}")
 
@@ -423,6 +519,7 @@ def main():
     base_dir = "D:/pythonProject/MitoFragility/MitoFragilityScore/Energies"
     output_base_dir = "D:/pythonProject/MitoFragility/DataPreparing/plots/output"
     snp_base_dir = "D:/pythonProject/MitoFragility/MitoFragilityScore/Sequences/Relative"
+    affected_base_dir = "D:/pythonProject/MitoFragility/DataPreparing/snv_log"
     
     ref_dir = os.path.join(base_dir, "SEQ-g38_Mt-Short_Test")
     
@@ -438,6 +535,7 @@ def main():
     
     for alt_dir, individual_id in individual_dirs:
         snp_file_path = os.path.join(snp_base_dir, f"test_individual_{individual_id}.csv")
+        affected_file_path = os.path.join(affected_base_dir, f"affected_constructs_test_individual_{individual_id}.csv")
         
         if not os.path.exists(alt_dir):
             logger.warning(f"Директория теста не существует: {alt_dir}")
@@ -454,7 +552,8 @@ def main():
                 alt_dir, 
                 snp_file_path, 
                 output_base_dir, 
-                individual_id
+                individual_id,
+                affected_file_path
             )
         except Exception as e:
             logger.error(f"Ошибка при обработке теста {individual_id}: {str(e)}")
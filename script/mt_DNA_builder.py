@@ -11,7 +11,7 @@ import logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-from scatter_plus_n_std import parse_construct_id, calculate_arm_ranges
+from scatter_plus_n_std import parse_construct_id, calculate_arm_ranges, select_affected_constructs
 
 def csv_constructor(excel_path: Path, output_path: Path) -> pd.DataFrame:
     """Создает CSV с SNV из XLSX"""
@@ -52,16 +52,16 @@ def csv_constructor(excel_path: Path, output_path: Path) -> pd.DataFrame:
     logger.info(f"Сохранено {len(final_df)} уникальных SNV в {output_path}")
     return final_df
 
-def get_covered_positions(ref_constructs_dir: str) -> set:
-    """Возвращает все позиции, покрытые конструктами референса"""
+def load_ref_construct_ids(ref_constructs_dir: str) -> list:
+    """Возвращает ID всех конструктов референса"""
 
     if not os.path.exists(ref_constructs_dir):
         logger.error(f"Директория с конструктами не существует: {ref_constructs_dir}")
-        return set()
+        return []
 
     if not os.path.isdir(ref_constructs_dir):
         logger.error(f"Путь не является директорией: {ref_constructs_dir}")
-        return set()
+        return []
     
     logger.info(f"Сканирую директорию с конструктами: {ref_constructs_dir}")
     
@@ -85,6 +85,10 @@ def get_covered_positions(ref_constructs_dir: str) -> set:
     
     logger.info(f"Проверено {file_count} файлов с конструктами")
     logger.info(f"Всего загружено {len(ref_constructs)} конструктов референса")
+    return ref_constructs
+
+def get_covered_positions(ref_constructs: list) -> set:
+    """Возвращает все позиции, покрытые конструктами референса"""
     
     covered_positions = set()
     processed_constructs = 0
@@ -116,8 +120,17 @@ def get_covered_positions(ref_constructs_dir: str) -> set:
     
     return covered_positions
 
-def apply_snvs(ref_record, snv_df, log_path: Path, covered_positions: set, num: int) -> SeqRecord:
-    """Применяет 2 случайные SNV к референсной последовательности, гарантируя их присутствие в конструктах референса"""
+def write_affected_constructs(ref_constructs: list, applied_positions: set, output_path: Path) -> list:
+    """Сохраняет ID конструктов, плечи которых перекрывают применённые SNV"""
+
+    affected_constructs = select_affected_constructs(ref_constructs, applied_positions)
+    pd.DataFrame({'ConstructID': affected_constructs}).to_csv(output_path, index=False)
+    logger.info(f"Затронуто {len(affected_constructs)} из {len(ref_constructs)} конструктов, список сохранён в {output_path}")
+    return affected_constructs
+
+def apply_snvs(ref_record, snv_df, log_path: Path, covered_positions: set, num: int) -> tuple:
+    """Применяет 2 случайные SNV к референсной последовательности, гарантируя их присутствие в конструктах референса.
+    Возвращает изменённую запись и множество применённых позиций"""
     original_seq = str(ref_record.seq).upper()
     mutable_seq = MutableSeq(original_seq)
     
@@ -213,11 +226,13 @@ def apply_snvs(ref_record, snv_df, log_path: Path, covered_positions: set, num:
     logger.info(f"Выбрано позиций: {len(selected_positions)}")
     logger.info(f"Успешно применено: {applied_count}")
     
+    applied_positions = {snv['position'] for snv in selected_snvs}
+    
     return SeqRecord(
         seq=mutable_seq,
         id=f"custom_mtDNA_{num}",
         description=f"Modified from {ref_record.id} | Applied {applied_count} of {len(selected_positions)} selected SNVs"
-    )
+    ), applied_positions
 
 def main(num: int):
 
@@ -226,6 +241,7 @@ def main(num: int):
     XLSX_PATH = Path("D:/pythonProject/MitoFragility/DataPreparing/raw_data/MitoPhewas_associations.xlsx")
     LOG_PATH = Path(f"D:/pythonProject/MitoFragility/DataPreparing/snv_log/snv_log_{num}.csv")
     OUTPUT_FASTA = Path(f"D:/pythonProject/MitoFragility/DataPreparing/sequences/relative_seq/test_individual_{num+4}.fasta")
+    AFFECTED_PATH = Path(f"D:/pythonProject/MitoFragility/DataPreparing/snv_log/affected_constructs_test_individual_{num+4}.csv")
     REF_CONSTRUCTS_DIR = "D:/pythonProject/MitoFragility/MitoFragilityScore/Energies/SEQ-g38_Mt-Short_Test"
     
     if num == 0 and not SNV_CSV_PATH.exists():
@@ -237,9 +253,11 @@ def main(num: int):
     logger.info(f"Загружена референсная последовательность: {ref_record.id}")
     logger.info(f"Длина: {len(ref_record.seq)} bp")
     
-    covered_positions = get_covered_positions(REF_CONSTRUCTS_DIR)
+    ref_constructs = load_ref_construct_ids(REF_CONSTRUCTS_DIR)
+    covered_positions = get_covered_positions(ref_constructs)
     
-    custom_record = apply_snvs(ref_record, snv_df, LOG_PATH, covered_positions, num)
+    custom_record, applied_positions = apply_snvs(ref_record, snv_df, LOG_PATH, covered_positions, num)
+    write_affected_constructs(ref_constructs, applied_positions, AFFECTED_PATH)
     
     SeqIO.write(custom_record, OUTPUT_FASTA, "fasta")
     logger.info(f"Результат сохранен в {OUTPUT_FASTA}")
@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import os
+import logging
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SNV_LOG_COLUMNS = ['position', 'original_base', 'ref_allele', 'alt_allele', 'status', 'notes']
+
+_ref_array = None
+
+def read_fasta_bytes(fasta_path: Path) -> tuple:
+    """Читает одиночную FASTA без Biopython, возвращает (id, последовательность в верхнем регистре)"""
+    with open(fasta_path, 'rb') as f:
+        record_id = _parse_header(fasta_path, f.readline())
+        seq = b''.join(line.strip() for line in f if not line.startswith(b'>'))
+    return record_id, seq.upper()
+
+def read_fasta_id(fasta_path: Path) -> str:
+    """Читает только ID записи из заголовка FASTA"""
+    with open(fasta_path, 'rb') as f:
+        return _parse_header(fasta_path, f.readline())
+
+def _parse_header(fasta_path: Path, header: bytes) -> str:
+    """Извлекает ID записи из строки заголовка FASTA"""
+    header = header.strip()
+    if not header.startswith(b'>'):
+        raise ValueError(f"Файл {fasta_path} не является FASTA: отсутствует заголовок")
+    return header[1:].split(maxsplit=1)[0].decode() if len(header) > 1 else Path(fasta_path).stem
+
+def drop_duplicate_ids(fasta_paths: list) -> list:
+    """Оставляет по одному файлу на ID записи, чтобы выходные CSV не перезаписывали друг друга"""
+    seen = {}
+    unique_paths = []
+    for fasta_path in fasta_paths:
+        try:
+            record_id = read_fasta_id(fasta_path)
+        except Exception as e:
+            logger.error(f"Ошибка чтения заголовка {fasta_path}: {str(e)}")
+            continue
+        if record_id in seen:
+            logger.error(
+                f"Повторяющийся ID '{record_id}' в {fasta_path} (уже встречен в {seen[record_id]}), файл пропущен"
+            )
+            continue
+        seen[record_id] = fasta_path
+        unique_paths.append(fasta_path)
+    return unique_paths
+
+def _init_worker(ref_bytes: bytes):
+    """Загружает референс в процесс-воркер один раз"""
+    global _ref_array
+    _ref_array = np.frombuffer(ref_bytes, dtype=np.uint8)
+
+def compare_to_reference(ref_array: np.ndarray, alt_seq: bytes) -> pd.DataFrame:
+    """Сравнивает последовательность с референсом побайтно, возвращает варианты в формате snv_log"""
+    alt_array = np.frombuffer(alt_seq, dtype=np.uint8)
+    if len(alt_array) != len(ref_array):
+        raise ValueError(
+            f"Длина последовательности ({len(alt_array)} bp) не совпадает "
+            f"с референсом ({len(ref_array)} bp)"
+        )
+
+    diff_idx = np.flatnonzero(ref_array != alt_array)
+    ref_bases = ref_array[diff_idx].tobytes().decode()
+    alt_bases = alt_array[diff_idx].tobytes().decode()
+
+    return pd.DataFrame({
+        'position': diff_idx + 1,
+        'original_base': list(ref_bases),
+        'ref_allele': list(ref_bases),
+        'alt_allele': list(alt_bases),
+        'status': 'APPLIED',
+        'notes': ''
+    }, columns=SNV_LOG_COLUMNS)
+
+def _extract_one(fasta_path: Path, output_dir: Path) -> tuple:
+    """Извлекает варианты одной особи и сохраняет CSV"""
+    record_id, alt_seq = read_fasta_bytes(fasta_path)
+    variants_df = compare_to_reference(_ref_array, alt_seq)
+    output_path = Path(output_dir) / f"{record_id}.csv"
+    variants_df.to_csv(output_path, index=False)
+    return record_id, len(variants_df), output_path
+
+def extract_variants(ref_fasta: Path, fasta_paths: list, output_dir: Path, max_workers: int = None) -> dict:
+    """Параллельно сравнивает все FASTA с референсом, возвращает {id: число вариантов}"""
+    _, ref_seq = read_fasta_bytes(ref_fasta)
+    logger.info(f"Загружена референсная последовательность: {ref_fasta}")
+    logger.info(f"Длина: {len(ref_seq)} bp")
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    unique_paths = drop_duplicate_ids(fasta_paths)
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(ref_seq,)) as executor:
+        futures = {executor.submit(_extract_one, path, output_dir): path for path in unique_paths}
+        for future, fasta_path in futures.items():
+            try:
+                record_id, variant_count, output_path = future.result()
+                results[record_id] = variant_count
+                logger.debug(f"{record_id}: {variant_count} вариантов сохранено в {output_path}")
+            except Exception as e:
+                logger.error(f"Ошибка обработки файла {fasta_path}: {str(e)}")
+
+    logger.info(f"Обработано {len(results)} из {len(fasta_paths)} последовательностей")
+    logger.info(f"Всего найдено {sum(results.values())} вариантов")
+    return results
+
+def main():
+
+    REF_FASTA = Path("D:/pythonProject/MitoFragility/DataPreparing/sequences/ref_seq/Homo_sapiens_assembly38.chrM.fasta")
+    RELATIVE_DIR = Path("D:/pythonProject/MitoFragility/DataPreparing/sequences/relative_seq")
+    OUTPUT_DIR = Path("D:/pythonProject/MitoFragility/MitoFragilityScore/Sequences/Relative")
+
+    fasta_paths = sorted(RELATIVE_DIR.glob("*.fasta"))
+    if not fasta_paths:
+        logger.warning(f"Не найдено ни одного FASTA в {RELATIVE_DIR}")
+        return
+
+    logger.info(f"Найдено {len(fasta_paths)} последовательностей в {RELATIVE_DIR}")
+    extract_variants(REF_FASTA, fasta_paths, OUTPUT_DIR)
+
+if __name__ == "__main__":
+
+    main()